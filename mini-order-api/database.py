@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 from dotenv import load_dotenv
 
@@ -9,9 +10,29 @@ load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./order_management.db")
 
 
+if DATABASE_URL.startswith("sqlite"):
+    engine_options = {
+        "connect_args": {"check_same_thread": False}  # Needed for SQLite
+    }
+    if DATABASE_URL in ("sqlite://", "sqlite:///:memory:"):
+        # An in-memory database only exists on its one connection
+        engine_options["poolclass"] = StaticPool
+else:
+    # Reuse warm connections (LIFO) so idle overflow ones can be recycled
+    engine_options = {
+        "pool_size": 20,
+        "max_overflow": 30,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "pool_use_lifo": True,
+    }
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
+    echo=False,
+    query_cache_size=1200,  # Room for every statement shape the app compiles
+    **engine_options
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
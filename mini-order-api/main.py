@@ -1,23 +1,25 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from typing import List, Optional
 from datetime import datetime
 import logging
+import os
 
-from database import get_db, engine
+from database import get_db, engine, SessionLocal
 from models import Base, User, OrderStatus
 from schemas import (
     UserRegister, UserLogin, UserResponse, Token, 
     OrderCreate, OrderResponse, RefreshTokenRequest, ErrorResponse
 )
 from auth import (
-    verify_password, create_access_token, create_refresh_token,
-    verify_token, get_current_user, get_password_hash
+    get_password_hash_async, verify_password_async, create_access_token, create_refresh_token,
+    verify_token, invalidate_token, invalidate_user, get_current_user, TEST_USER_PASSWORD_HASH
 )
 from crud import (
     get_user_by_email, create_user, create_order,
@@ -32,20 +34,31 @@ logger = logging.getLogger(__name__)
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
 # Hard-code a test user if not exists
 def ensure_test_user():
-    db = next(get_db())
-    test_email = "test@example.com"
-    test_user = db.query(User).filter(User.email == test_email).first()
-    if not test_user:
-        user = User(
-            name="Test User",
-            email=test_email,
-            password_hash=get_password_hash("Password123")
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    test_user = {
+        "name": "Test User",
+        "email": "test@example.com",
+        "password_hash": TEST_USER_PASSWORD_HASH
+    }
+    dialect = UPSERT_DIALECTS.get(engine.dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(User).values(**test_user).on_conflict_do_nothing(index_elements=["email"])
+        with engine.begin() as conn:
+            conn.execute(stmt)
+        return
+
+    # Other backends: check first, then insert
+    db = SessionLocal()
+    try:
+        if get_user_by_email(db, test_user["email"]) is None:
+            db.add(User(**test_user))
+            db.commit()
+    finally:
+        db.close()
 
 ensure_test_user()
 
@@ -53,11 +66,17 @@ ensure_test_user()
 app = FastAPI(
     title="Mini Order Management API",
     description="Order Management System with JWT Authentication and Background Processing",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Rate limiter: fixed-window counters, in-process by default.
+# Point RATE_LIMIT_STORAGE_URI at Redis (redis://host:port) to share limits across workers.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=os.getenv("RATE_LIMIT_STORAGE_URI", "memory://"),
+    strategy="fixed-window"
+)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
@@ -73,11 +92,20 @@ app.add_middleware(
 # Start background scheduler
 scheduler = start_scheduler()
 
-# Serve frontend
+def _parse_date(value: str) -> datetime:
+    # Fast path for the documented YYYY-MM-DD form; anything else goes through full ISO parsing
+    if len(value) == 10 and value[4] == "-" and value[7] == "-":
+        year, month, day = value.split("-")
+        return datetime(int(year), int(month), int(day))
+    return datetime.fromisoformat(value)
+
+# Serve frontend (read once; the page is static)
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend.html"), "rb") as f:
+    FRONTEND_HTML = f.read()
+
 @app.get("/", response_class=HTMLResponse)
 async def serve_frontend():
-    with open("frontend.html", "r") as f:
-        return f.read()
+    return HTMLResponse(content=FRONTEND_HTML)
 
 # Health check
 @app.get("/health")
@@ -102,9 +130,10 @@ async def register(request: Request, user: UserRegister, db: Session = Depends(g
                 detail="Email already registered"
             )
         
-        # Create new user
+        # Create new user (bcrypt runs on a worker thread)
         try:
-            new_user = create_user(db, user)
+            password_hash = await get_password_hash_async(user.password)
+            new_user = create_user(db, user, password_hash)
             logger.info(f"New user registered: {new_user.email}")
             return new_user
         except ValueError as ve:
@@ -130,9 +159,9 @@ async def login(request: Request, user: UserLogin, db: Session = Depends(get_db)
     Returns JWT access token (15 min expiry) and refresh token (7 days expiry).
     """
     try:
-        # Verify user credentials
+        # Verify user credentials (bcrypt runs on a worker thread)
         db_user = get_user_by_email(db, user.email)
-        if not db_user or not verify_password(user.password, db_user.password_hash):
+        if not db_user or not await verify_password_async(user.password, db_user.password_hash):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
@@ -168,6 +197,8 @@ async def refresh_token(request: Request, refresh_request: RefreshTokenRequest,
     try:
         # Verify refresh token
         token_data = verify_token(refresh_request.refresh_token, token_type="refresh")
+        invalidate_token(refresh_request.refresh_token)
+        invalidate_user(token_data.email)
         
         # Get user
         db_user = get_user_by_email(db, token_data.email)
@@ -238,8 +269,8 @@ async def get_orders(
     """
     try:
         # Parse dates if provided
-        start_dt = datetime.fromisoformat(start_date) if start_date else None
-        end_dt = datetime.fromisoformat(end_date) if end_date else None
+        start_dt = _parse_date(start_date) if start_date else None
+        end_dt = _parse_date(end_date) if end_date else None
         
         orders = get_user_orders(db, current_user.id, status_filter, start_dt, end_dt)
         return orders
@@ -292,7 +323,7 @@ async def cancel_user_order(
 
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content={"detail": "Resource not found"}
     )
@@ -300,7 +331,7 @@ async def not_found_handler(request, exc):
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
     logger.error(f"Internal server error: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "Internal server error"}
     )
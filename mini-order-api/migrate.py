@@ -25,11 +25,11 @@ def create_tables():
         
         logger.info("\n   orders:")
         logger.info("     - id (INTEGER PRIMARY KEY)")
-        logger.info("     - user_id (INTEGER, FOREIGN KEY → users.id, INDEXED)")
+        logger.info("     - user_id (INTEGER, FOREIGN KEY → users.id)")
         logger.info("     - product_name (TEXT)")
         logger.info("     - amount (REAL)")
         logger.info("     - status (TEXT, INDEXED)")
-        logger.info("     - created_at (TIMESTAMP, INDEXED)")
+        logger.info("     - created_at (TIMESTAMP)")
         logger.info("     - updated_at (TIMESTAMP)")
         
         logger.info("\n🔗 Relationships:")
@@ -37,9 +37,9 @@ def create_tables():
         
         logger.info("\n Indexes created:")
         logger.info("   - idx_users_email")
-        logger.info("   - idx_orders_user_id")
         logger.info("   - idx_orders_status")
-        logger.info("   - idx_orders_created_at")
+        logger.info("   - ix_orders_user_created (user_id, created_at DESC, id DESC)")
+        logger.info("   - ix_orders_pending (id WHERE status = pending)")
         
         logger.info("\n Database ready! Run 'python main.py' to start the server.")
         
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql import func
 import enum
 from database import Base
 
@@ -17,7 +17,7 @@ class User(Base):
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     password_hash = Column(String(128), nullable=False)  # Make sure this is not too short!
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), default=func.now(), server_default=func.now())
 
     # Relationship to orders
     orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
@@ -26,12 +26,24 @@ class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     product_name = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     status = Column(SQLEnum(OrderStatus), default=OrderStatus.PENDING, index=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), default=func.now(), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), default=func.now(), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Serves the per-user order listing, including its ORDER BY created_at DESC, id DESC
+        Index("ix_orders_user_created", "user_id", created_at.desc(), id.desc()),
+        # Only pending rows, for the background job's scan
+        Index(
+            "ix_orders_pending",
+            "id",
+            postgresql_where=(status == OrderStatus.PENDING),
+            sqlite_where=(status == OrderStatus.PENDING),
+        ),
+    )
 
     # Relationship to user
     user = relationship("User", back_populates="orders")
\ No newline at end of file
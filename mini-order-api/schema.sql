@@ -26,9 +26,13 @@ CREATE TABLE orders (
 );
 
 -- Create indexes for better query performance
-CREATE INDEX idx_orders_user_id ON orders(user_id);
 CREATE INDEX idx_orders_status ON orders(status);
-CREATE INDEX idx_orders_created_at ON orders(created_at);
+
+-- Composite index for listing a user's orders newest first
+CREATE INDEX ix_orders_user_created ON orders(user_id, created_at DESC, id DESC);
+
+-- Partial index so the background job only scans pending orders
+CREATE INDEX ix_orders_pending ON orders(id) WHERE status = 'pending';
 
 -- Create a composite index for filtering orders by user and status
 CREATE INDEX idx_orders_user_status ON orders(user_id, status);
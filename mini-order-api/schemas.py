@@ -1,17 +1,28 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Optional
 from models import OrderStatus
 import re
 
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def _validate_email(value: str) -> str:
+    if not EMAIL_RE.fullmatch(value):
+        raise ValueError("value is not a valid email address")
+    # Lowercase the domain, as EmailStr's normalization did
+    local, domain = value.rsplit("@", 1)
+    return f"{local}@{domain.lower()}"
+
+Email = Annotated[str, AfterValidator(_validate_email)]
+
 # User Schemas
 class UserRegister(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
-    email: EmailStr
+    email: Email
     password: str = Field(..., min_length=8, max_length=50)
 
 class UserLogin(BaseModel):
-    email: EmailStr
+    email: Email
     password: str
 
 class UserResponse(BaseModel):
@@ -20,8 +31,7 @@ class UserResponse(BaseModel):
     email: str
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Token Schemas
 class Token(BaseModel):
@@ -49,8 +59,7 @@ class OrderResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Error Response
 class ErrorResponse(BaseModel):